@@ -2,13 +2,16 @@
 
 import streamlit as st
 
-from src.ui.loaders import load_transports_ui, load_eta_ui, load_telematics_ui
+from src.ui.loaders import prefetch_local_events, load_transports_ui, load_eta_ui, load_telematics_ui
 from src.ui.filters import apply_quick_filters
 from src.ui.views import render_transport_view_or_distribution
 
 st.set_page_config(page_title="Transports Viewer", layout="wide")
 st.title("🚚 Transports.csv Viewer")
 
+# --- Start reading the events CSVs in the background ---
+prefetch_local_events()
+
 # --- Load Transports ---
 df = load_transports_ui()
 if df is None:
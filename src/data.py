@@ -1,19 +1,148 @@
+import hashlib
+import io
 import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+
+# Strings stay Arrow-backed; numeric and timestamp columns map to regular NumPy dtypes
+# so the .dt / period accessors and Altair serialization keep working unchanged.
+_ARROW_TYPES_MAPPER = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}.get
+
+def _hash_buffer(buffer) -> bytes:
+    return hashlib.blake2b(buffer.getvalue()).digest()
+
+def _convert_options() -> pa_csv.ConvertOptions:
+    return pa_csv.ConvertOptions(
+        timestamp_parsers=[pa_csv.ISO8601, "%Y-%m-%dT%H:%M:%S%z"],
+        strings_can_be_null=True,
+    )
+
+def _as_arrow_source(path_or_buffer):
+    if hasattr(path_or_buffer, "getvalue"):
+        return pa.BufferReader(path_or_buffer.getvalue())
+    return path_or_buffer
+
+# Event-time sort keys; only used when Arrow parsed them as timestamps (strings would sort lexically)
+_TIME_SORT_COLUMNS = ("created_at", "CREATED_AT", "CREATEDAT")
+
+def _sorted_by(table: pa.Table, sort_by: tuple[str, ...]) -> pa.Table:
+    keys = [
+        (c, "ascending") for c in sort_by
+        if c in table.column_names
+        and (c not in _TIME_SORT_COLUMNS or pa.types.is_timestamp(table.schema.field(c).type))
+    ]
+    return table.sort_by(keys) if keys else table
+
+def _read_csv_arrow(path_or_buffer) -> pa.Table:
+    """Parse a CSV path or in-memory upload with the multi-threaded PyArrow reader."""
+    return pa_csv.read_csv(
+        _as_arrow_source(path_or_buffer),
+        read_options=pa_csv.ReadOptions(block_size=8 << 20, use_threads=True),
+        convert_options=_convert_options(),
+    )
+
+_STREAM_BLOCK_SIZE = 4 << 20
+
+def read_csv_streaming(buf, on_batch=None, sort_by: tuple[str, ...] = ()) -> pa.Table:
+    """
+    Parse a CSV upload block by block with pyarrow.csv.open_csv, so peak memory stays around one
+    block plus the table being built. on_batch(fraction_done, n_rows) is called after every block.
+    Column types are inferred from the first block; if a later block doesn't fit them, the whole
+    buffer is re-read in one go. Rows are sorted like load_events_arrow(sort_by=...).
+    """
+    data = buf.getvalue()
+    try:
+        reader = pa_csv.open_csv(
+            pa.BufferReader(data),
+            read_options=pa_csv.ReadOptions(block_size=_STREAM_BLOCK_SIZE),
+            convert_options=_convert_options(),
+        )
+        batches, n_rows = [], 0
+        while True:
+            try:
+                batch = reader.read_next_batch()
+            except StopIteration:
+                break
+            batches.append(batch)
+            n_rows += batch.num_rows
+            if on_batch is not None:
+                on_batch(min(1.0, len(batches) * _STREAM_BLOCK_SIZE / max(len(data), 1)), n_rows)
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+    except pa.ArrowInvalid:
+        table = _read_csv_arrow(buf)
+    return _sorted_by(table, sort_by)
+
+def arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(
+        types_mapper=_ARROW_TYPES_MAPPER,
+        coerce_temporal_nanoseconds=True,
+        self_destruct=True,
+    )
+
+@st.cache_data(show_spinner=False, hash_funcs={UploadedFile: _hash_buffer, io.BytesIO: _hash_buffer})
+def load_csv(path_or_buffer, mtime: float | None = None):
+    """
+    Load a small CSV (transports) as a DataFrame. st.cache_data hands each caller its own copy,
+    which _prepared_transports relies on when it adds/retypes columns. Use load_events_arrow for the
+    large events files. Pass the file's mtime for local paths so an edited file is re-read.
+    """
+    return arrow_to_pandas(_read_csv_arrow(path_or_buffer))
+
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={UploadedFile: _hash_buffer, io.BytesIO: _hash_buffer})
+def load_events_arrow(path_or_buffer, sort_by: tuple[str, ...] = (), mtime: float | None = None) -> pa.Table:
+    """Load a (large) events CSV as a PyArrow table, shared across reruns and sessions.
+
+    Rows are sorted by the `sort_by` columns that exist (e.g. the transport id), so each
+    transport is one contiguous run. Callers slice it per transport before converting to
+    pandas; never mutate it. `mtime` only keys the cache (a rewritten file is parsed again);
+    max_entries keeps superseded versions from piling up.
+    """
+    return _sorted_by(_read_csv_arrow(path_or_buffer), sort_by)
+
+@st.cache_data(show_spinner=False)
+def unique_sorted(series: pd.Series) -> list[str]:
+    """Sorted distinct non-null values as strings, for filter widget options."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Only the integer codes are scanned; the strings come from the (small) categories
+        codes = series.cat.codes.to_numpy()
+        present = np.unique(codes[codes >= 0])
+        return sorted(series.cat.categories[present].astype(str).tolist())
+    return sorted(series.dropna().astype(str).unique().tolist())
 
 @st.cache_data(show_spinner=False)
-def load_csv(path_or_buffer):
-    return pd.read_csv(path_or_buffer)
+def numeric_bounds(series: pd.Series) -> tuple[int, int]:
+    """(min, max) of a numeric column as ints, ignoring NaN, for slider bounds."""
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return int(np.nanmin(values)), int(np.nanmax(values))
 
 @st.cache_data(show_spinner=False)
+def started_at_days_months(days: pd.Series, months: pd.Series) -> tuple[list, list]:
+    """
+    Distinct STARTED_AT_DAY (Timestamps) / STARTED_AT_MONTH (int YYYYMM) values, newest first,
+    for filter widget options. Uniques and sorting run on int64 data; only the result is boxed.
+    """
+    day_index = pd.DatetimeIndex(days.dropna().unique()).sort_values(ascending=False)
+    month_ids = np.unique(months.dropna().to_numpy(dtype=np.int64))[::-1]
+    return day_index.tolist(), month_ids.tolist()
+
+@st.cache_resource(show_spinner=False)
 def load_eta_events():
-    """Load eta_events.csv from working dir or /mnt/data. Returns (df or None, source_path or error_details)."""
+    """
+    Load eta_events.csv from working dir or /mnt/data. Returns (table or None, source_path or error_details).
+    The table is shared (not copied) between callers; treat it as read-only.
+    """
     tried = []
     for p in ["eta_events.csv", os.path.join("/mnt/data", "eta_events.csv")]:
         try:
-            df = pd.read_csv(p)
-            return df, p
+            table = _read_csv_arrow(p)
+            return table, p
         except Exception as e:
             tried.append(f"{p} -> {e}")
-    return None, "\n".join(tried)
\ No newline at end of file
+    return None, "\n".join(tried)
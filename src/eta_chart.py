@@ -1,20 +1,19 @@
+import numpy as np
 import pandas as pd
 import altair as alt
 import streamlit as st
 
+from src.helpers import _parse_coords, _to_utc
+
 def _empty_chart():
     return alt.Chart(pd.DataFrame({"x": []})).mark_rule(), alt.Chart(pd.DataFrame({"x": []})).mark_text()
 
-def _midnight_layers(events_df: pd.DataFrame):
-    if events_df.empty or "created_at" not in events_df.columns:
-        return (
-            alt.Chart(pd.DataFrame({"x": []})).mark_rule(),
-            alt.Chart(pd.DataFrame({"x": []})).mark_text(),
-        )
+def _midnight_layers(min_ts: pd.Timestamp, max_ts: pd.Timestamp):
+    """Midnight rules + day labels spanning [min_ts, max_ts] (the already-parsed event time range)."""
+    if pd.isna(min_ts) or pd.isna(max_ts):
+        return _empty_chart()
 
-    min_time = pd.to_datetime(events_df["created_at"]).min().normalize()
-    max_time = pd.to_datetime(events_df["created_at"]).max().normalize() + pd.Timedelta(days=1)
-    midnights = pd.date_range(start=min_time, end=max_time, freq="D")
+    midnights = pd.date_range(start=min_ts.normalize(), end=max_ts.normalize() + pd.Timedelta(days=1), freq="D")
 
     midnight_df = pd.DataFrame({
         "midnight": midnights,
@@ -60,22 +59,21 @@ def _telematics_layers(telematics_events_df: pd.DataFrame):
     if not required.issubset(set(telematics_events_df.columns)):
         return _empty_chart()
 
-    df = telematics_events_df.copy()
     # Parse datetimes (handle 'Z'); keep tz-aware to avoid unintended shifts
-    df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
+    df = telematics_events_df.assign(created_at=_to_utc(telematics_events_df["created_at"]))
     df = df.dropna(subset=["created_at"])
 
     # Parse coordinates to lat/lon if present (format "(lat,lon)")
     if "position_coordinates" in df.columns:
-        coords = df["position_coordinates"].astype(str).str.strip("()").str.split(",", n=1, expand=True)
-        if coords.shape[1] == 2:
-            with pd.option_context("mode.chained_assignment", None):
-                df["lat"] = pd.to_numeric(coords[0], errors="coerce")
-                df["lon"] = pd.to_numeric(coords[1], errors="coerce")
+        lat, lon = _parse_coords(df["position_coordinates"])
+        df = df.assign(lat=lat, lon=lon)
 
     if df.empty:
         return _empty_chart()
 
+    # Only the encoded columns go to the browser (rules and labels share this one dataset)
+    df = df[[c for c in ("created_at", "type", "lat", "lon") if c in df.columns]]
+
     # Color per TYPE
     color_domain = sorted(df["type"].astype(str).unique())
     color_range = [
@@ -113,40 +111,93 @@ def _telematics_layers(telematics_events_df: pd.DataFrame):
 
     return rules, labels
 
-import pandas as pd
-import altair as alt
+def _downsample_lttb(df: pd.DataFrame, x_col: str, y_col: str, n_out: int = 2000) -> pd.DataFrame:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line (df must be sorted by x_col).
+    Keeps the first and last rows and, per bucket, the row forming the largest triangle with
+    the previously kept row and the average of the next bucket, so peaks and dips survive.
+    """
+    n = len(df)
+    if n_out < 3 or n <= n_out:
+        return df
+
+    x = df[x_col].to_numpy(dtype="datetime64[ns]").view("i8")
+    x = (x - x[0]).astype(np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+
+    every = (n - 2) / (n_out - 2)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
 
+    return df.iloc[keep]
+
+def _version_per_row(events_df: pd.DataFrame, col: str, v3_pat: str, v2_pat: str) -> np.ndarray:
+    """
+    "v3" / "v2" / None per row, from a case-insensitive substring match on `col`.
+    Only the column's distinct values (categories) are tested, then broadcast back via the codes;
+    'source' arrives already lower-cased and categorical from load_eta_events_for_transport.
+    """
+    if col not in events_df.columns:
+        return np.full(len(events_df), None, dtype=object)
+    cat = events_df[col].astype("category")
+    labels = cat.cat.categories.astype(str).str.lower()
+    per_category = np.select(
+        [labels.str.contains(v3_pat, regex=False), labels.str.contains(v2_pat, regex=False)],
+        ["v3", "v2"],
+        default=None,
+    )
+    # Code -1 (missing value) picks the trailing None
+    return np.append(per_category, None)[cat.cat.codes.to_numpy()]
+
+_NS_PER_HOUR = 3_600_000_000_000
+_NAT_NS = np.iinfo(np.int64).min
+
+def _hours_since(ts: pd.Series, ref_ts) -> np.ndarray:
+    """(ts - ref_ts) in hours as float64, computed on the int64 nanosecond view; NaN where either side is NaT."""
+    ts_ns = ts.to_numpy(dtype="datetime64[ns]").view("i8")
+    if pd.isna(ref_ts):
+        return np.full(len(ts_ns), np.nan)
+    hours = (ts_ns - ref_ts.value) * (1.0 / _NS_PER_HOUR)
+    hours[ts_ns == _NAT_NS] = np.nan
+    return hours
+
+# Timelines longer than this are downsampled to roughly _DOWNSAMPLE_TO points (unless full_fidelity)
+_DOWNSAMPLE_ABOVE = 3000
+_DOWNSAMPLE_TO = 2000
+
+# Keyed on the per-transport frames (hashed by content), the unload time and the options, so reruns
+# from unrelated widgets reuse the built chart instead of re-deriving, downsampling and re-layering it.
+@st.cache_data(show_spinner=False, max_entries=64)
 def eta_timeline_chart(
     events_df: pd.DataFrame,
     telematics_events_df: pd.DataFrame,   # prefiltered to this transport (or empty)
     reached_unloading_at,
-    height: int = 420
+    height: int = 420,
+    full_fidelity: bool = False,
 ):
-    # --- Copy & parse ---
-    events_df = events_df.copy()
-    events_df["created_at"] = pd.to_datetime(events_df["created_at"], errors="coerce", utc=True)
-    events_df["calculated_eta"] = pd.to_datetime(events_df["calculated_eta"], errors="coerce", utc=True)
+    # --- Parse (assign returns a new frame; the caller's frame is left untouched) ---
+    events_df = events_df.assign(
+        created_at=pd.to_datetime(events_df["created_at"], errors="coerce", utc=True),
+        calculated_eta=pd.to_datetime(events_df["calculated_eta"], errors="coerce", utc=True),
+    )
     unload_ts = pd.to_datetime(reached_unloading_at, errors="coerce", utc=True)
 
     # --- Derived fields ---
-    events_df["eta_relative_hr"] = (events_df["calculated_eta"] - unload_ts) / pd.Timedelta(hours=1)
-
-    def _derive_version(row):
-        # Prefer explicit VERSION column if present
-        if "VERSION" in events_df.columns and pd.notna(row.get("VERSION")):
-            v = str(row["VERSION"]).lower()
-            if "3" in v or "v3" in v:
-                return "v3"
-            if "2" in v or "v2" in v:
-                return "v2"
-        # Heuristic from 'source'
-        s = str(row.get("source", "")).lower()
-        if "v3" in s: return "v3"
-        if "v2" in s: return "v2"
-        return "unknown"
+    events_df = events_df.assign(eta_relative_hr=_hours_since(events_df["calculated_eta"], unload_ts))
 
     if "version" not in events_df.columns:
-        events_df["version"] = events_df.apply(_derive_version, axis=1)
+        # Prefer explicit VERSION column if present, then the heuristic from 'source'
+        ver = _version_per_row(events_df, "VERSION", "3", "2")
+        src = _version_per_row(events_df, "source", "v3", "v2")
+        events_df["version"] = np.where(pd.notna(ver), ver, np.where(pd.notna(src), src, "unknown"))
     else:
         events_df["version"] = (
             events_df["version"].astype(str).str.lower()
@@ -158,8 +209,19 @@ def eta_timeline_chart(
     if events_df.empty:
         return alt.Chart(pd.DataFrame({"x": [], "y": []})).mark_point().properties(height=height)
 
+    # --- Downsample long timelines (per version, so each line keeps its own shape) ---
+    if not full_fidelity and len(events_df) > _DOWNSAMPLE_ABOVE:
+        total = len(events_df)
+        events_df = pd.concat([
+            _downsample_lttb(g, "created_at", "eta_relative_hr", max(3, _DOWNSAMPLE_TO * len(g) // total))
+            for _, g in events_df.groupby("version", sort=False)
+        ]).sort_values("created_at")
+
     # --- Base chart (ETA line + points) ---
-    base = alt.Chart(events_df).encode(
+    # Streamlit sends each distinct layer dataset to the browser once (as Arrow), so the
+    # payload is set by what we hand Altair: keep just the encoded columns.
+    chart_df = events_df[["created_at", "calculated_eta", "eta_relative_hr", "version"]]
+    base = alt.Chart(chart_df).encode(
         x=alt.X("created_at:T", title="Event time", axis=alt.Axis(format="%H:%M")),
         y=alt.Y("eta_relative_hr:Q", title="ETA difference (hours)", axis=alt.Axis(format="+.1f")),
         color=alt.Color("version:N", title="ETA Version"),
@@ -180,8 +242,9 @@ def eta_timeline_chart(
         .encode(y="y:Q")
     )
 
+    first_ts, last_ts = events_df["created_at"].min(), events_df["created_at"].max()
     unload_label_df = pd.DataFrame({
-        "x": [events_df["created_at"].min()],
+        "x": [first_ts],
         "y": [0],
         "label": [unload_ts.strftime("%Y-%m-%d %H:%M %Z") if pd.notna(unload_ts) else "unloading"],
     })
@@ -192,7 +255,7 @@ def eta_timeline_chart(
     )
 
     # --- Midnight guides (assumes you have this helper) ---
-    midnight_rules, midnight_labels = _midnight_layers(events_df)
+    midnight_rules, midnight_labels = _midnight_layers(first_ts, last_ts)
     # Keep them subtle
     midnight_rules = midnight_rules.mark_rule(opacity=0.45, color="yellow")
     midnight_labels = midnight_labels.mark_text(color="yellow")
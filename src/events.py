@@ -1,12 +1,70 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
-def _pick_first_existing_column(frame: pd.DataFrame, candidates):
+from src.data import arrow_to_pandas
+from src.helpers import _parse_coords, _to_utc
+
+def _pick_first_existing_column(frame: pd.DataFrame | pa.Table, candidates):
+    columns = frame.column_names if isinstance(frame, pa.Table) else frame.columns
     for c in candidates:
-        if c in frame.columns:
+        if c in columns:
             return c
     return None
 
+# Transport-id column candidates, in order of preference
+ETA_ID_COLUMNS = ("TRANSPORT_ID",)
+TELEMATICS_ID_COLUMNS = ("TRANSPORTID", "TRANSPORT_ID")
+
+# Load-time sort keys (only the columns that exist are used): each transport is one run, in event order.
+# Time columns Arrow left as strings are skipped there; _in_time_order sorts those slices after parsing.
+ETA_SORT_COLUMNS = ETA_ID_COLUMNS + ("created_at", "CREATED_AT")
+TELEMATICS_SORT_COLUMNS = TELEMATICS_ID_COLUMNS + ("created_at", "CREATEDAT", "CREATED_AT")
+
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={pa.Table: id})
+def _build_id_index(table: pa.Table, col: str) -> tuple[pa.Table, pa.Table, dict[str, tuple[int, int]]]:
+    """
+    Maps transport id -> (offset, length) of its contiguous run of rows, built once per loaded table.
+    Tables are sorted by id at load (load_events_arrow(sort_by=...)); an unsorted table is sorted here.
+    Returns (input table, table the runs index into, index). The cache is keyed on id(table), so the
+    input table is kept in the cached value: alive, its id() can't be reused by another table.
+    """
+    def _runs(t):
+        ids = t[col].cast(pa.string()).to_numpy(zero_copy_only=False)
+        return ids, np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+
+    if table.num_rows == 0:  # header-only file: nothing to index
+        return table, table, {}
+
+    indexed = table
+    ids, starts = _runs(indexed)
+    if len(starts) != len(pd.unique(ids[starts])):  # some id is split over several runs
+        indexed = table.sort_by(col)
+        ids, starts = _runs(indexed)
+    lengths = np.diff(np.r_[starts, len(ids)])
+    return table, indexed, dict(zip(ids[starts], zip(starts.tolist(), lengths.tolist())))
+
+def index_transports(table: pa.Table, id_columns: tuple[str, ...]) -> None:
+    """Build (and cache) the id index for a freshly loaded table, so the first selection is just a lookup."""
+    col = _pick_first_existing_column(table, id_columns)
+    if col is not None:
+        _build_id_index(table, col)
+
+def _filter_transport(table: pa.Table, col: str, selected_id: str) -> pd.DataFrame:
+    """Look up one transport in the id index and materialize only its rows (a zero-copy slice)."""
+    _, table, index = _build_id_index(table, col)
+    run = index.get(str(selected_id))
+    if run is None:
+        return pd.DataFrame()
+    return arrow_to_pandas(table.slice(*run))
+
+def _in_time_order(events: pd.DataFrame) -> pd.DataFrame:
+    """Sorts a parsed per-transport slice by created_at, unless the load-time sort already did."""
+    if "created_at" in events.columns and not events["created_at"].is_monotonic_increasing:
+        events = events.sort_values("created_at", kind="stable")
+    return events
+
 def find_unloading_time(row: pd.Series):
     candidates = ["REACHED_UNLOADING_AT"]
     for c in candidates:
@@ -14,28 +72,28 @@ def find_unloading_time(row: pd.Series):
             return pd.to_datetime(row[c], errors="coerce")
     return None
 
-def load_eta_events_for_transport(selected_id: str, events_all: pd.DataFrame | None = None):
-    # Prefer preloaded df from session
+def load_eta_events_for_transport(selected_id: str, events_all: pa.Table | None = None):
+    # Prefer preloaded table from session
     events = None
     if isinstance(selected_id, (int, float)):
         selected_id = str(selected_id)
 
-    if 'events_all' in st.session_state and isinstance(st.session_state.events_all, pd.DataFrame):
-        events = st.session_state.events_all.copy()
-    if events_all is not None and isinstance(events_all, pd.DataFrame):
-        events = events_all.copy()
+    if 'events_all' in st.session_state and isinstance(st.session_state.events_all, pa.Table):
+        events = st.session_state.events_all
+    if events_all is not None and isinstance(events_all, pa.Table):
+        events = events_all
 
     if events is None:
         return None  # caller will handle missing
 
     # Find the transport-id column
-    col = _pick_first_existing_column(events, ["TRANSPORT_ID"])
+    col = _pick_first_existing_column(events, ETA_ID_COLUMNS)
     if col is None:
         st.warning("eta_events.csv does not contain a transport identifier column.")
         return None
 
-    # Filter
-    events = events[events[col].astype(str) == str(selected_id)].copy()
+    # Filter (only the matching rows are converted to pandas)
+    events = _filter_transport(events, col, selected_id)
     if events.empty:
         return pd.DataFrame()
 
@@ -50,21 +108,26 @@ def load_eta_events_for_transport(selected_id: str, events_all: pd.DataFrame | N
         if alt_eta:
             rename_map[alt_eta] = "calculated_eta"
 
+    if rename_map:
+        events = events.rename(columns=rename_map)
+
     for _col in ["created_at", "calculated_eta"]:
         if _col in events.columns:
             # Coerce to pandas datetime and set/convert to UTC (tz-aware)
             events[_col] = pd.to_datetime(events[_col], errors="coerce", utc=True)
+    events = _in_time_order(events)
 
-    if rename_map:
-        events = events.rename(columns=rename_map)
+    # Case-fold 'source' once per transport; the chart derives versions from its few categories
+    if "source" in events.columns:
+        events["source"] = events["source"].astype("string").str.lower().astype("category")
 
     return events
 
 
-def load_telematics_events_for_transport(selected_id: str, telem_all: pd.DataFrame | None = None):
+def load_telematics_events_for_transport(selected_id: str, telem_all: pa.Table | None = None):
     """
     Returns a telematics events DataFrame filtered to a single transport.
-    Prefers a preloaded df from st.session_state.telematic_all, but can accept an override via telem_all.
+    Prefers a preloaded table from st.session_state.telematic_all, but can accept an override via telem_all.
     Normalizes common column names and types:
       - created_at (datetime, UTC)  <- CREATEDAT / CREATED_AT
       - type (str)                  <- TYPE
@@ -77,22 +140,22 @@ def load_telematics_events_for_transport(selected_id: str, telem_all: pd.DataFra
 
     # Source selection (session first, then override if provided)
     events = None
-    if "telematic_all" in st.session_state and isinstance(st.session_state.telematic_all, pd.DataFrame):
-        events = st.session_state.telematic_all.copy()
-    if telem_all is not None and isinstance(telem_all, pd.DataFrame):
-        events = telem_all.copy()
+    if "telematic_all" in st.session_state and isinstance(st.session_state.telematic_all, pa.Table):
+        events = st.session_state.telematic_all
+    if telem_all is not None and isinstance(telem_all, pa.Table):
+        events = telem_all
 
     if events is None:
         return None  # caller handles missing
 
     # Find the transport-id column
-    col = _pick_first_existing_column(events, ["TRANSPORTID", "TRANSPORT_ID"])
+    col = _pick_first_existing_column(events, TELEMATICS_ID_COLUMNS)
     if col is None:
         st.warning("telematic_events.csv does not contain a transport identifier column.")
         return None
 
-    # Filter to this transport
-    events = events[events[col].astype(str) == str(selected_id)].copy()
+    # Filter to this transport (only the matching rows are converted to pandas)
+    events = _filter_transport(events, col, selected_id)
     if events.empty:
         return pd.DataFrame()
 
@@ -122,14 +185,12 @@ def load_telematics_events_for_transport(selected_id: str, telem_all: pd.DataFra
 
     # Coerce datetimes and set tz to UTC
     if "created_at" in events.columns:
-        events["created_at"] = pd.to_datetime(events["created_at"], errors="coerce", utc=True)
+        events["created_at"] = _to_utc(events["created_at"])
+        events = _in_time_order(events)
 
     # Extract lat/lon from "(lat,lon)" if available
     if "position_coordinates" in events.columns:
-        coords = events["position_coordinates"].astype(str).str.strip().str.strip("()").str.split(",", n=1, expand=True)
-        if isinstance(coords, pd.DataFrame) and coords.shape[1] == 2:
-            with pd.option_context("mode.chained_assignment", None):
-                events["lat"] = pd.to_numeric(coords[0], errors="coerce")
-                events["lon"] = pd.to_numeric(coords[1], errors="coerce")
+        lat, lon = _parse_coords(events["position_coordinates"])
+        events = events.assign(lat=lat, lon=lon)
 
     return events
\ No newline at end of file
@@ -2,23 +2,43 @@ import base64
 import binascii
 import struct
 
-def _wkb_point_to_lonlat(wkb_input):
+import numpy as np
+import pandas as pd
+
+_WKB_POINT_LEN = 1 + 4 + 16  # endian flag + geometry type + (x, y)
+
+_NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+_COORDS_PATTERN = r"\(?\s*" + _NUMBER + r"\s*,\s*" + _NUMBER + r"\s*\)?"
+
+def _parse_coords(series: pd.Series):
     """
-    Returns (lon, lat) tuple or None if it can't decode.
-    Accepts Base64 string, HEX string, or bytes.
-    Handles optional 4-byte 0x00000000 prefix.
-    Only supports WKB Point (type=1).
-    Prefers coordinates that fall in Europe; may swap (x,y) -> (y,x) if appropriate.
+    Parses "(lat,lon)" strings in a single regex pass.
+    Returns (lat, lon) float Series aligned with the input; NaN where a value doesn't match.
     """
+    parts = series.astype("string").str.extract(_COORDS_PATTERN)
+    lat = pd.to_numeric(parts[0], errors="coerce").astype("float64")
+    lon = pd.to_numeric(parts[1], errors="coerce").astype("float64")
+    return lat, lon
 
-    def in_global(lon, lat):
-        return (-180.0 <= lon <= 180.0) and (-90.0 <= lat <= 90.0)
-
-    # A generous Europe bounding box
-    # (covers Canary Islands to western Russia, Mediterranean to Scandinavia)
-    def in_europe(lon, lat):
-        return (-31.0 <= lon <= 60.0) and (30.0 <= lat <= 75.0)
+def _to_utc(series: pd.Series) -> pd.Series:
+    """
+    tz-aware UTC datetimes. Columns that are already datetime64 (e.g. parsed by Arrow at load) are only
+    localized/converted; strings are parsed as ISO 8601, and only values that aren't ISO 8601
+    (e.g. "... UTC") fall back to pandas' format inference.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.tz_localize("UTC") if series.dt.tz is None else series.dt.tz_convert("UTC")
+    parsed = pd.to_datetime(series, format="ISO8601", errors="coerce", utc=True)
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], errors="coerce", utc=True)
+    return parsed
 
+def _wkb_bytes(wkb_input):
+    """
+    Decodes a Base64 string, HEX string, or bytes to raw WKB bytes (None if it can't).
+    Strips the optional 4-byte 0x00000000 prefix.
+    """
     if wkb_input is None:
         return None
 
@@ -46,7 +66,27 @@ def _wkb_point_to_lonlat(wkb_input):
     if len(b) >= 9 and b[:4] == b"\x00\x00\x00\x00" and b[4] in (0, 1):
         b = b[4:]
 
-    if len(b) < 1 + 4 + 16:
+    return b
+
+def _wkb_point_to_lonlat(wkb_input):
+    """
+    Returns (lon, lat) tuple or None if it can't decode.
+    Accepts Base64 string, HEX string, or bytes.
+    Handles optional 4-byte 0x00000000 prefix.
+    Only supports WKB Point (type=1).
+    Prefers coordinates that fall in Europe; may swap (x,y) -> (y,x) if appropriate.
+    """
+
+    def in_global(lon, lat):
+        return (-180.0 <= lon <= 180.0) and (-90.0 <= lat <= 90.0)
+
+    # A generous Europe bounding box
+    # (covers Canary Islands to western Russia, Mediterranean to Scandinavia)
+    def in_europe(lon, lat):
+        return (-31.0 <= lon <= 60.0) and (30.0 <= lat <= 75.0)
+
+    b = _wkb_bytes(wkb_input)
+    if b is None or len(b) < _WKB_POINT_LEN:
         return None
 
     byte_order = b[0]
@@ -85,4 +125,44 @@ def _wkb_point_to_lonlat(wkb_input):
     if swap_valid:
         return (lon_sw, lat_sw)
 
-    return None
\ No newline at end of file
+    return None
+
+def wkb_points_to_lonlat(series: pd.Series) -> np.ndarray:
+    """
+    Batch version of _wkb_point_to_lonlat for a whole column.
+    Returns an (N, 2) float64 array of (lon, lat) aligned with the series; NaN where a value can't be decoded.
+    Only the byte decoding is per value; endianness, type checks and the Europe heuristic run vectorized.
+    """
+    n = len(series)
+    records = np.zeros((n, _WKB_POINT_LEN), dtype=np.uint8)
+    decoded = np.zeros(n, dtype=bool)
+    for i, value in enumerate(series):
+        b = _wkb_bytes(value)
+        if b is not None and len(b) >= _WKB_POINT_LEN:
+            records[i] = np.frombuffer(b, dtype=np.uint8, count=_WKB_POINT_LEN)
+            decoded[i] = True
+
+    little = records[:, 0] == 1
+    gtype = np.where(
+        little,
+        np.ascontiguousarray(records[:, 1:5]).view("<u4")[:, 0],
+        np.ascontiguousarray(records[:, 1:5]).view(">u4")[:, 0],
+    )
+    coords = np.ascontiguousarray(records[:, 5:])
+    xy = np.where(little[:, None], coords.view("<f8"), coords.view(">f8"))
+    valid = decoded & (records[:, 0] <= 1) & (gtype == 1)
+
+    # WKB point convention here: x=lon, y=lat; same orientation rules as the scalar version
+    lon, lat = xy[:, 0], xy[:, 1]
+    orig_valid = valid & (np.abs(lon) <= 180.0) & (np.abs(lat) <= 90.0)
+    swap_valid = valid & (np.abs(lat) <= 180.0) & (np.abs(lon) <= 90.0)
+    orig_eu = (lon >= -31.0) & (lon <= 60.0) & (lat >= 30.0) & (lat <= 75.0)
+    swap_eu = (lat >= -31.0) & (lat <= 60.0) & (lon >= 30.0) & (lon <= 75.0)
+
+    use_orig = (orig_valid & orig_eu) | (orig_valid & ~swap_valid)
+    use_swap = ~use_orig & swap_valid
+
+    out = np.full((n, 2), np.nan)
+    out[use_orig] = xy[use_orig]
+    out[use_swap] = xy[use_swap][:, ::-1]
+    return out
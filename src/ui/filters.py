@@ -1,74 +1,80 @@
 # src/ui/filters.py
+import numpy as np
 import pandas as pd
 import streamlit as st
+from src.data import unique_sorted, numeric_bounds, started_at_days_months
 
 def apply_quick_filters(df: pd.DataFrame) -> pd.DataFrame:
-    fdf = df.copy()
+    # Filters AND into a single mask; the frame is indexed once at the end.
+    # Option lists still cascade: each widget only offers values left by the filters before it.
+    mask = np.ones(len(df), dtype=bool)
 
     # First row of filters
     cols = st.columns([1, 1, 2, 2])
 
     # LOADING_COUNTRY
-    if "LOADING_COUNTRY" in fdf.columns:
+    if "LOADING_COUNTRY" in df.columns:
         with cols[0]:
             sel = st.multiselect(
                 "LOADING_COUNTRY",
-                sorted(fdf["LOADING_COUNTRY"].dropna().astype(str).unique()),
+                unique_sorted(df["LOADING_COUNTRY"][mask]),
                 []
             )
             if sel:
-                fdf = fdf[fdf["LOADING_COUNTRY"].astype(str).isin(sel)]
+                mask &= df["LOADING_COUNTRY"].isin(sel).to_numpy()
 
     # UNLOADING_COUNTRY
-    if "UNLOADING_COUNTRY" in fdf.columns:
+    if "UNLOADING_COUNTRY" in df.columns:
         with cols[1]:
             sel = st.multiselect(
                 "UNLOADING_COUNTRY",
-                sorted(fdf["UNLOADING_COUNTRY"].dropna().astype(str).unique()),
+                unique_sorted(df["UNLOADING_COUNTRY"][mask]),
                 []
             )
             if sel:
-                fdf = fdf[fdf["UNLOADING_COUNTRY"].astype(str).isin(sel)]
+                mask &= df["UNLOADING_COUNTRY"].isin(sel).to_numpy()
 
     # DISTANCE
-    if "DISTANCE" in fdf.columns and pd.api.types.is_numeric_dtype(fdf["DISTANCE"]):
+    if "DISTANCE" in df.columns and pd.api.types.is_numeric_dtype(df["DISTANCE"]):
         with cols[2]:
-            dmin, dmax = int(fdf["DISTANCE"].min()), int(fdf["DISTANCE"].max())
+            dmin, dmax = numeric_bounds(df["DISTANCE"][mask])
             fmin, fmax = st.slider("DISTANCE range", dmin, dmax, (dmin, dmax))
-            fdf = fdf[(fdf["DISTANCE"] >= fmin) & (fdf["DISTANCE"] <= fmax)]
+            mask &= df["DISTANCE"].between(fmin, fmax, inclusive="both").to_numpy()
 
     # STARTED_AT day & month
-    if "STARTED_AT" in fdf.columns:
+    if "STARTED_AT" in df.columns:
         with cols[3]:
-            fdf["STARTED_AT"] = pd.to_datetime(fdf["STARTED_AT"], errors="coerce")
+            # STARTED_AT_DAY / STARTED_AT_MONTH are derived once in load_transports_ui
+            available_days, available_months = started_at_days_months(
+                df["STARTED_AT_DAY"][mask], df["STARTED_AT_MONTH"][mask]
+            )
 
             # Day filter
-            available_days = sorted(fdf["STARTED_AT"].dropna().dt.normalize().unique(), reverse=True)
             selected_days = st.multiselect(
                 "STARTED_AT days",
                 options=available_days,
                 format_func=lambda x: x.strftime("%Y-%m-%d"),
             )
             if selected_days:
-                fdf = fdf[fdf["STARTED_AT"].dt.normalize().isin(selected_days)]
+                mask &= df["STARTED_AT_DAY"].isin(selected_days).to_numpy()
+                _, available_months = started_at_days_months(
+                    df["STARTED_AT_DAY"][mask], df["STARTED_AT_MONTH"][mask]
+                )
 
             # Month filter
-            available_months = sorted(
-                fdf["STARTED_AT"].dropna().dt.to_period("M").unique(), reverse=True
-            )
             selected_months = st.multiselect(
                 "STARTED_AT months",
                 options=available_months,
-                format_func=lambda x: x.strftime("%Y-%m"),
+                format_func=lambda ym: f"{ym // 100:04d}-{ym % 100:02d}",
             )
             if selected_months:
-                fdf = fdf[fdf["STARTED_AT"].dt.to_period("M").isin(selected_months)]
+                mask &= df["STARTED_AT_MONTH"].isin(selected_months).to_numpy()
 
     # Second row: VEHICLE_SIZE
-    if "VEHICLE_SIZE" in fdf.columns:
+    if "VEHICLE_SIZE" in df.columns:
         vcols = st.columns([1])
         with vcols[0]:
-            vs_options = sorted(fdf["VEHICLE_SIZE"].dropna().astype(str).unique())
+            vs_options = unique_sorted(df["VEHICLE_SIZE"][mask])
             default_sel = [v for v in vs_options if v not in ("1_bus", "4_any_size")]
             selected_sizes = st.multiselect(
                 "VEHICLE_SIZE",
@@ -76,6 +82,7 @@ def apply_quick_filters(df: pd.DataFrame) -> pd.DataFrame:
                 default=default_sel
             )
             if selected_sizes:
-                fdf = fdf[fdf["VEHICLE_SIZE"].astype(str).isin(selected_sizes)]
+                mask &= df["VEHICLE_SIZE"].isin(selected_sizes).to_numpy()
 
-    return fdf
\ No newline at end of file
+    # Nothing filtered out: hand back the frame itself instead of a full boolean-indexed copy
+    return df if mask.all() else df[mask]
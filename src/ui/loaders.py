@@ -1,7 +1,74 @@
 # src/ui/loaders.py
+import io
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
-from src.data import load_csv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+from src.data import _hash_buffer, load_csv, load_events_arrow, read_csv_streaming
+from src.events import (
+    ETA_ID_COLUMNS, ETA_SORT_COLUMNS, TELEMATICS_ID_COLUMNS, TELEMATICS_SORT_COLUMNS, index_transports,
+)
+from src.helpers import wkb_points_to_lonlat
+
+ETA_LOCAL_PATH = "local_data/eta_events.csv"
+TELEMATICS_LOCAL_PATH = "local_data/telematic_events.csv"
+TRANSPORTS_LOCAL_PATH = "local_data/transports.csv"
+
+def prefetch_local_events() -> None:
+    """
+    Starts reading the local ETA and telematic CSVs on worker threads and returns immediately,
+    so both parse (and get their transport-id index built) concurrently with each other and with
+    the transports load. Each file version is read by one thread only; later reruns just get the
+    already-started future back. load_eta_ui / load_telematics_ui then pick the tables up from the
+    load_events_arrow cache (waiting on its per-key lock if a read is still running) and report
+    any errors themselves.
+    """
+    for radio_key, path, sort_by, id_columns in (
+        ("eta_source", ETA_LOCAL_PATH, ETA_SORT_COLUMNS, ETA_ID_COLUMNS),
+        ("telem_source", TELEMATICS_LOCAL_PATH, TELEMATICS_SORT_COLUMNS, TELEMATICS_ID_COLUMNS),
+    ):
+        if st.session_state.get(radio_key, "Local file") == "Local file" and os.path.exists(path):
+            _start_prefetch(path, sort_by, id_columns, os.path.getmtime(path))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _start_prefetch(path: str, sort_by: tuple[str, ...], id_columns: tuple[str, ...], mtime: float) -> Future:
+    """Submits one background load per (path, mtime), shared across reruns and sessions."""
+    executor = ThreadPoolExecutor(
+        max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())
+    )
+    future = executor.submit(_load_and_index, path, sort_by, id_columns, mtime)
+    executor.shutdown(wait=False)
+    return future
+
+def _load_and_index(path: str, sort_by: tuple[str, ...], id_columns: tuple[str, ...], mtime: float) -> None:
+    index_transports(load_events_arrow(path, sort_by=sort_by, mtime=mtime), id_columns)
+
+@st.cache_data(show_spinner=False, hash_funcs={UploadedFile: _hash_buffer, io.BytesIO: _hash_buffer})
+def _prepared_transports(path_or_buffer, mtime: float | None = None) -> pd.DataFrame:
+    """
+    load_csv plus the parsed/typed and derived columns the filters and map use, computed once per
+    file version (path + mtime, or upload content) rather than on every rerun.
+    """
+    df = load_csv(path_or_buffer, mtime=mtime)
+    if "STARTED_AT" in df.columns:
+        df["STARTED_AT"] = pd.to_datetime(df["STARTED_AT"], errors="coerce")
+        df["STARTED_AT_DAY"] = df["STARTED_AT"].dt.normalize()
+        # Month as an int YYYYMM id (cheap to unique/isin); formatted only for the widget labels
+        df["STARTED_AT_MONTH"] = (df["STARTED_AT"].dt.year * 100 + df["STARTED_AT"].dt.month).astype("Int64")
+    # Loading/unloading points decoded from WKB once per load, not on every map render
+    for prefix in ("LOADING", "UNLOADING"):
+        if f"{prefix}_COORDINATES" in df.columns:
+            lonlat = wkb_points_to_lonlat(df[f"{prefix}_COORDINATES"])
+            df[f"{prefix}_LON"], df[f"{prefix}_LAT"] = lonlat[:, 0], lonlat[:, 1]
+    # Categorical filter columns: isin() compares integer codes, option lists come from the categories
+    for c in ("LOADING_COUNTRY", "UNLOADING_COUNTRY", "VEHICLE_SIZE"):
+        if c in df.columns:
+            df[c] = df[c].astype("string").astype("category")
+    return df
 
 def load_transports_ui() -> pd.DataFrame | None:
     df = None
@@ -9,19 +76,39 @@ def load_transports_ui() -> pd.DataFrame | None:
 
     if source == "Local file":
         try:
-            df = load_csv("local_data/transports.csv")
+            df = _prepared_transports(TRANSPORTS_LOCAL_PATH, mtime=os.path.getmtime(TRANSPORTS_LOCAL_PATH))
             st.sidebar.success("Loaded transports.csv")
         except Exception as e:
             st.sidebar.error(f"Could not load transports.csv\n\n{e}")
     else:
         uploaded = st.sidebar.file_uploader("Upload transports CSV", type=["csv"], key="transports_uploader")
         if uploaded:
-            df = load_csv(uploaded)
+            df = _prepared_transports(uploaded)
             st.sidebar.success("Uploaded transports CSV loaded")
 
     return df
 
-def load_eta_ui() -> pd.DataFrame | None:
+def _load_uploaded_events(uploaded, sort_by: tuple[str, ...], id_columns: tuple[str, ...], state_key: str) -> pa.Table:
+    """
+    Stream-parses (and indexes) an uploaded events CSV behind a progress bar, once per uploaded file.
+    The table is kept in st.session_state[state_key] together with the upload's file_id.
+    """
+    cached = st.session_state.get(state_key)
+    if cached is not None and cached[0] == uploaded.file_id:
+        return cached[1]
+
+    progress = st.progress(0.0, text="Parsing upload…")
+    table = read_csv_streaming(
+        uploaded,
+        on_batch=lambda done, n_rows: progress.progress(done, text=f"Parsed {n_rows:,} rows…"),
+        sort_by=sort_by,
+    )
+    index_transports(table, id_columns)
+    progress.empty()
+    st.session_state[state_key] = (uploaded.file_id, table)
+    return table
+
+def load_eta_ui() -> pa.Table | None:
     with st.sidebar:
         st.header("ETA events source")
         eta_source_choice = st.radio(
@@ -34,7 +121,9 @@ def load_eta_ui() -> pd.DataFrame | None:
         events_all, events_source = None, "No file selected"
         if eta_source_choice == "Local file":
             try:
-                events_all = load_csv("local_data/eta_events.csv")
+                events_all = load_events_arrow(
+                    ETA_LOCAL_PATH, sort_by=ETA_SORT_COLUMNS, mtime=os.path.getmtime(ETA_LOCAL_PATH)
+                )
                 events_source = "Local file"
             except Exception as e:
                 events_all = None
@@ -43,24 +132,24 @@ def load_eta_ui() -> pd.DataFrame | None:
             uploaded_eta = st.file_uploader("Upload ETA events CSV", type=["csv"], key="eta_uploader")
             if uploaded_eta:
                 try:
-                    events_all = load_csv(uploaded_eta)
+                    events_all = _load_uploaded_events(uploaded_eta, ETA_SORT_COLUMNS, ETA_ID_COLUMNS, "_eta_upload")
                     events_source = "Uploaded file"
                 except Exception as e:
                     events_all = None
                     events_source = f"Error: {e}"
 
-        if isinstance(events_all, pd.DataFrame):
+        if isinstance(events_all, pa.Table):
             st.session_state.events_all = events_all
             st.success(f"Loaded eta_events.csv from: {events_source}")
-            st.caption(f"Rows: {len(events_all):,} | Cols: {events_all.shape[1]:,}")
+            st.caption(f"Rows: {events_all.num_rows:,} | Cols: {events_all.num_columns:,}")
             with st.expander("Preview ETA events (first 50 rows)"):
-                st.dataframe(events_all.head(50), use_container_width=True, hide_index=True)
+                st.dataframe(events_all.slice(0, 50), use_container_width=True, hide_index=True)
         else:
             st.warning("ETA events CSV not loaded. Charts will be unavailable until this loads.\n\n" + str(events_source))
 
         return events_all
 
-def load_telematics_ui() -> pd.DataFrame | None:
+def load_telematics_ui() -> pa.Table | None:
     with st.sidebar:
         st.header("Telematic events source")
         telem_source_choice = st.radio(
@@ -73,7 +162,9 @@ def load_telematics_ui() -> pd.DataFrame | None:
         telem_all, telem_source = None, "No file selected"
         if telem_source_choice == "Local file":
             try:
-                telem_all = load_csv("local_data/telematic_events.csv")
+                telem_all = load_events_arrow(
+                    TELEMATICS_LOCAL_PATH, sort_by=TELEMATICS_SORT_COLUMNS, mtime=os.path.getmtime(TELEMATICS_LOCAL_PATH)
+                )
                 telem_source = "Local file"
             except Exception as e:
                 telem_all = None
@@ -82,18 +173,18 @@ def load_telematics_ui() -> pd.DataFrame | None:
             uploaded_telem = st.file_uploader("Upload telematic events CSV", type=["csv"], key="telem_uploader")
             if uploaded_telem:
                 try:
-                    telem_all = load_csv(uploaded_telem)
+                    telem_all = _load_uploaded_events(uploaded_telem, TELEMATICS_SORT_COLUMNS, TELEMATICS_ID_COLUMNS, "_telem_upload")
                     telem_source = "Uploaded file"
                 except Exception as e:
                     telem_all = None
                     telem_source = f"Error: {e}"
 
-        if isinstance(telem_all, pd.DataFrame):
+        if isinstance(telem_all, pa.Table):
             st.session_state.telematic_all = telem_all  # keep the same key used elsewhere
             st.success(f"Loaded telematic_events.csv from: {telem_source}")
-            st.caption(f"Rows: {len(telem_all):,} | Cols: {telem_all.shape[1]:,}")
+            st.caption(f"Rows: {telem_all.num_rows:,} | Cols: {telem_all.num_columns:,}")
             with st.expander("Preview telematic_events (first 50 rows)"):
-                st.dataframe(telem_all.head(50), use_container_width=True, hide_index=True)
+                st.dataframe(telem_all.slice(0, 50), use_container_width=True, hide_index=True)
         else:
             st.warning("Telematic events CSV not loaded. Related charts will be unavailable until this loads.\n\n" + str(telem_source))
 
@@ -1,6 +1,7 @@
 # src/ui/views.py
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 import altair as alt
 import pydeck as pdk
@@ -11,14 +12,13 @@ from src.events import (
     find_unloading_time,
 )
 from src.eta_chart import eta_timeline_chart
-from src.helpers import _wkb_point_to_lonlat
+from src.helpers import _parse_coords, _to_utc
 
+try:
+    import polars as pl
+except ImportError:  # optional; the distribution view falls back to pandas
+    pl = None
 
-def _first_df(*candidates):
-    for c in candidates:
-        if isinstance(c, pd.DataFrame):
-            return c
-    return None
 
 def _pick_table_columns(table_df: pd.DataFrame) -> pd.DataFrame:
     preferred_cols = [
@@ -37,25 +37,34 @@ def _telematics_points_df_single(telematics_events_df: pd.DataFrame) -> pd.DataF
     if not isinstance(telematics_events_df, pd.DataFrame) or telematics_events_df.empty:
         return pd.DataFrame(columns=["lat", "lon", "type", "created_at"])
 
-    gdf = telematics_events_df.copy()
+    gdf = telematics_events_df
 
-    # If lat/lon are not present but position_coordinates is, try to parse (safety net)
-    if ("lat" not in gdf.columns or "lon" not in gdf.columns) and "position_coordinates" in gdf.columns:
-        coords = gdf["position_coordinates"].astype(str).str.strip().str.strip("()").str.split(",", n=1, expand=True)
-        if isinstance(coords, pd.DataFrame) and coords.shape[1] == 2:
-            gdf["lat"] = pd.to_numeric(coords[0], errors="coerce")
-            gdf["lon"] = pd.to_numeric(coords[1], errors="coerce")
+    # lat/lon normally come from the loader; parse position_coordinates only if they're missing (safety net)
+    if "lat" not in gdf.columns or "lon" not in gdf.columns:
+        if "position_coordinates" not in gdf.columns:
+            return pd.DataFrame(columns=["lat", "lon", "type", "created_at"])
+        lat, lon = _parse_coords(gdf["position_coordinates"])
+        gdf = gdf.assign(lat=lat, lon=lon)
 
-    gdf = gdf.dropna(subset=["lat", "lon"]).copy()
+    gdf = gdf.dropna(subset=["lat", "lon"])
 
-    # Ensure expected columns exist
+    # Ensure expected columns exist (assign: the caller's frame is never written to)
     if "type" not in gdf.columns:
-        gdf["type"] = "event"
+        gdf = gdf.assign(type="event")
     if "created_at" in gdf.columns:
-        gdf["created_at"] = pd.to_datetime(gdf["created_at"], errors="coerce", utc=True)
+        gdf = gdf.assign(created_at=_to_utc(gdf["created_at"]))
 
     return gdf
 
+# ~0.1 m at the equator; plenty for map rendering
+_COORD_DECIMALS = 6
+
+_TYPE_PALETTE = np.array([
+    [31,119,180],[255,127,14],[44,160,44],[214,39,40],
+    [148,103,189],[140,86,75],[227,119,194],[127,127,127],
+    [188,189,34],[23,190,207],
+], dtype=np.uint8)
+
 def summary_panel(trow) -> None:
     with st.container():
         c1, c2, c3, c4 = st.columns(4)
@@ -66,27 +75,28 @@ def summary_panel(trow) -> None:
         c3.metric("Avg diff v2 (min)", trow["AVERAGE_ETA_DIFF_V2"])
         c4.metric("Avg diff v3 (min)", trow["AVERAGE_ETA_DIFF_V3"])
 
+def _row_lonlat(trow, prefix: str):
+    """(lon, lat) from the row's {prefix}_LON / {prefix}_LAT columns, or None if missing."""
+    lon, lat = trow.get(f"{prefix}_LON"), trow.get(f"{prefix}_LAT")
+    if lon is None or lat is None or pd.isna(lon) or pd.isna(lat):
+        return None
+    return lon, lat
+
 def _render_single_transport_telematics_map(trow: pd.DataFrame, telematics_events_df: pd.DataFrame, title: str):
     gdf = _telematics_points_df_single(telematics_events_df)
     if gdf.empty:
         st.info("No telematic events with coordinates for this transport.")
         return
 
-    if "created_at" in gdf.columns:
-        gdf = gdf.sort_values("created_at")
-
-    # Colors per 'type'
-    types = sorted(gdf["type"].astype(str).fillna("unknown").unique())
-    palette = [[31,119,180],[255,127,14],[44,160,44],[214,39,40],
-               [148,103,189],[140,86,75],[227,119,194],[127,127,127],
-               [188,189,34],[23,190,207]]
-    cmap = {t: palette[i % len(palette)] for i, t in enumerate(types)}
-    colors = gdf["type"].map(cmap).tolist()
-    gdf[["color_r","color_g","color_b"]] = pd.DataFrame(colors, index=gdf.index)
+    # Points (and so the path) are already in created_at order: telematics are sorted at load
+    # Colors per 'type': categories come out sorted, so each type keeps a stable palette slot
+    type_codes = gdf["type"].astype("string").fillna("unknown").astype("category").cat.codes.to_numpy()
+    rgb = _TYPE_PALETTE[type_codes % len(_TYPE_PALETTE)]
+    gdf = gdf.assign(color_r=rgb[:, 0], color_g=rgb[:, 1], color_b=rgb[:, 2])
 
-    # Decode loading/unloading WKB
-    load_lonlat = _wkb_point_to_lonlat(trow.get("LOADING_COORDINATES"))
-    unload_lonlat = _wkb_point_to_lonlat(trow.get("UNLOADING_COORDINATES"))
+    # Loading/unloading points (decoded from WKB in load_transports_ui)
+    load_lonlat = _row_lonlat(trow, "LOADING")
+    unload_lonlat = _row_lonlat(trow, "UNLOADING")
 
     # Build concentric ring features: 5 km and 20 km
     rings = []
@@ -151,9 +161,13 @@ def _render_single_transport_telematics_map(trow: pd.DataFrame, telematics_event
         minZoom=0, maxZoom=19, tileSize=256,
     )
 
+    # The whole frame is JSON-encoded into the deck, so send only what the layer and tooltip use
+    point_cols = [c for c in ("lon", "lat", "type", "created_at", "color_r", "color_g", "color_b") if c in gdf.columns]
+    points_df = gdf[point_cols].round({"lon": _COORD_DECIMALS, "lat": _COORD_DECIMALS})
+
     points_layer = pdk.Layer(
         "ScatterplotLayer",
-        data=gdf,
+        data=points_df,
         get_position="[lon, lat]",
         get_fill_color="[color_r, color_g, color_b, 190]",
         get_radius=120,
@@ -165,7 +179,10 @@ def _render_single_transport_telematics_map(trow: pd.DataFrame, telematics_event
         line_width_min_pixels=0.5,
     )
 
-    path_data = [{"path": gdf[["lon", "lat"]].values.tolist()}]
+    # st.pydeck_chart ships the deck as JSON (an ndarray would be stringified, and there is no binary
+    # attribute path outside Jupyter), so the path must be a list; rounding to _COORD_DECIMALS first
+    # roughly halves the JSON the browser has to download and parse.
+    path_data = [{"path": np.round(gdf[["lon", "lat"]].to_numpy(dtype=np.float64), _COORD_DECIMALS).tolist()}]
     path_layer = pdk.Layer(
         "PathLayer",
         data=path_data,
@@ -198,12 +215,28 @@ def _render_single_transport_telematics_map(trow: pd.DataFrame, telematics_event
     )
     st.caption("Basemap © OpenStreetMap contributors")
 
-def render_transport_view_or_distribution(fdf: pd.DataFrame, events_all: pd.DataFrame | None, telem_all: pd.DataFrame | None):
+# Derived/raw helper columns (see load_transports_ui) that aren't useful in the selection table
+_SELECTION_HIDDEN_COLUMNS = (
+    "STARTED_AT_DAY", "STARTED_AT_MONTH",
+    "LOADING_COORDINATES", "UNLOADING_COORDINATES",
+    "LOADING_LON", "LOADING_LAT", "UNLOADING_LON", "UNLOADING_LAT",
+)
+
+@st.cache_data(show_spinner=False)
+def _selection_table(fdf: pd.DataFrame) -> pa.Table:
+    """
+    The filtered transports as shown in the selection table, converted to Arrow once per filter state.
+    Only columns are dropped, so row positions still index fdf.
+    """
+    cols = [c for c in fdf.columns if c not in _SELECTION_HIDDEN_COLUMNS]
+    return pa.Table.from_pandas(fdf[cols], preserve_index=False)
+
+def render_transport_view_or_distribution(fdf: pd.DataFrame, events_all: pa.Table | None, telem_all: pa.Table | None):
     st.subheader("Select a transport")
     st.caption("Click a row to select it. Selection persists across filters until the row disappears.")
 
     event = st.dataframe(
-        fdf,
+        _selection_table(fdf),
         use_container_width=True,
         hide_index=True,
         on_select="rerun",
@@ -224,8 +257,8 @@ def render_transport_view_or_distribution(fdf: pd.DataFrame, events_all: pd.Data
             st.success(f"Selected transport ID: **{selected_id}**")
 
             # Filter events for this transport
-            events_src = _first_df(events_all, st.session_state.get('events_all'))
-            telem_src = _first_df(telem_all, st.session_state.get('telematic_all'))
+            events_src = events_all if isinstance(events_all, pa.Table) else st.session_state.get('events_all')
+            telem_src = telem_all if isinstance(telem_all, pa.Table) else st.session_state.get('telematic_all')
 
             events_df = load_eta_events_for_transport(str(selected_id), events_all=events_src)
             telematics_events_df = load_telematics_events_for_transport(str(selected_id), telem_all=telem_src)
@@ -241,7 +274,14 @@ def render_transport_view_or_distribution(fdf: pd.DataFrame, events_all: pd.Data
             summary_panel(selected_row)
 
             st.subheader("ETA timeline")
-            chart = eta_timeline_chart(events_df, telematics_events_df, reached_unloading_at, height=420)
+            full_fidelity = st.toggle(
+                "Full fidelity",
+                value=False,
+                help="Plot every ETA event. Long timelines are otherwise downsampled (LTTB) to keep the chart fast.",
+            )
+            chart = eta_timeline_chart(
+                events_df, telematics_events_df, reached_unloading_at, height=420, full_fidelity=full_fidelity
+            )
             st.altair_chart(chart, use_container_width=True)
 
             if isinstance(telematics_events_df, pd.DataFrame) and not telematics_events_df.empty:
@@ -253,9 +293,8 @@ def render_transport_view_or_distribution(fdf: pd.DataFrame, events_all: pd.Data
 
             # ETA events table
             try:
-                table_df = _pick_table_columns(events_df.copy())
-                if "created_at" in table_df.columns:
-                    table_df = table_df.sort_values("created_at")
+                # Already in created_at order: events are sorted by (transport, created_at) at load
+                table_df = _pick_table_columns(events_df)
                 st.subheader("ETA events")
                 st.dataframe(table_df, use_container_width=True, hide_index=True)
             except Exception as e:
@@ -267,6 +306,39 @@ def render_transport_view_or_distribution(fdf: pd.DataFrame, events_all: pd.Data
     else:
         _render_distribution_view(fdf)
 
+@st.cache_data(show_spinner=False)
+def _numeric_metric(values: pd.Series) -> np.ndarray:
+    """Finite float64 values of one metric column; non-numeric, NaN and ±inf entries are dropped."""
+    if pl is not None:
+        # Lazy cast + filter runs as one fused Polars pass
+        frame = pl.from_pandas(values.to_frame())
+        col = pl.col(values.name)
+        # pd.to_numeric accepts surrounding whitespace, Polars' string cast doesn't; strip so both paths agree
+        parsed = col.str.strip_chars() if frame.schema[values.name] == pl.String else col
+        return (
+            frame.lazy()
+            .select(parsed.cast(pl.Float64, strict=False))
+            .filter(col.is_finite())
+            .collect()
+            .to_series()
+            .to_numpy()
+        )
+    numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return numeric[np.isfinite(numeric)]
+
+@st.cache_data(show_spinner=False)
+def _histogram_bins(values: np.ndarray, bin_width: float) -> pd.DataFrame:
+    """
+    Fixed-width bins aligned to multiples of bin_width (the edges Vega's bin=alt.Bin(step=...) drew):
+    bin_start, bin_end, count. Only occupied bins are returned, so an outlier far from the rest
+    doesn't add a row for every empty bin in between.
+    """
+    lo = np.floor(float(values.min()) / bin_width) * bin_width
+    # Fixed width, so each value's bin is a direct index (no edge search)
+    bins, counts = np.unique(np.floor((values - lo) / bin_width), return_counts=True)
+    starts = lo + bins * bin_width
+    return pd.DataFrame({"bin_start": starts, "bin_end": starts + bin_width, "count": counts})
+
 def _render_distribution_view(fdf: pd.DataFrame):
     st.subheader("Transports distribution by ETA difference")
 
@@ -291,30 +363,30 @@ def _render_distribution_view(fdf: pd.DataFrame):
     with c2:
         show_table = st.checkbox("Show binned table", value=False)
 
-    plot_df = fdf.copy()
-    plot_df[selected_metric] = pd.to_numeric(plot_df[selected_metric], errors="coerce")
-    plot_df = plot_df.dropna(subset=[selected_metric])
+    # Only the selected metric is prepared; both steps are memoized, so widget reruns that
+    # don't change the metric, the filters or the bin width are cache hits.
+    values = _numeric_metric(fdf[selected_metric])
 
-    st.caption(f"Transports counted: {len(plot_df):,} (filtered). Metric: **{selected_metric}**")
+    st.caption(f"Transports counted: {len(values):,} (filtered). Metric: **{selected_metric}**")
 
-    if plot_df.empty:
+    if len(values) == 0:
         st.info("No data points for the selected metric in the current filters.")
         return
 
-    # Histogram
+    binned = _histogram_bins(values, bin_width)
+
+    # Histogram (pre-binned: the browser gets one row per bin, not one per transport)
     chart = (
-        alt.Chart(plot_df)
+        alt.Chart(binned)
         .mark_bar()
         .encode(
-            x=alt.X(
-                f"{selected_metric}:Q",
-                bin=alt.Bin(step=bin_width),
-                title=f"{selected_metric}",
-            ),
-            y=alt.Y("count():Q", title="Number of transports"),
+            x=alt.X("bin_start:Q", title=f"{selected_metric}"),
+            x2="bin_end:Q",
+            y=alt.Y("count:Q", title="Number of transports"),
             tooltip=[
-                alt.Tooltip(f"{selected_metric}:Q", bin=alt.Bin(step=bin_width), title="Metric (bin)"),
-                alt.Tooltip("count():Q", title="# transports"),
+                alt.Tooltip("bin_start:Q", title="Metric (bin start)"),
+                alt.Tooltip("bin_end:Q", title="Metric (bin end)"),
+                alt.Tooltip("count:Q", title="# transports"),
             ],
         )
         .properties(height=380)
@@ -322,17 +394,4 @@ def _render_distribution_view(fdf: pd.DataFrame):
     st.altair_chart(chart, use_container_width=True)
 
     if show_table:
-        s = plot_df[selected_metric]
-        lo = float(s.min()); hi = float(s.max())
-        if hi == lo:
-            hi = lo + bin_width
-        edges = list(np.arange(lo, hi + bin_width, bin_width))
-        cats = pd.cut(s, bins=edges, include_lowest=True)
-        binned = (
-            pd.DataFrame({selected_metric: cats})
-            .value_counts()
-            .reset_index(name="count")
-            .rename(columns={0: "bin"})
-            .sort_values("bin")
-        )
-        st.dataframe(binned, use_container_width=True, hide_index=True)
\ No newline at end of file
+        st.dataframe(binned, use_container_width=True, hide_index=True)